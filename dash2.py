@@ -155,6 +155,11 @@ with left:
         unsafe_allow_html=True
     )
 
+    st.markdown("**Top drivers**")
+    for c in safety["contributions"][:3]:
+        arrow = "▲" if c["contribution"] >= 0 else "▼"
+        st.caption(f"{arrow} {c['feature']}: {c['contribution']:+.3f}")
+
 # ---------- NEWS ----------
 with right:
     st.markdown("### 📰 Latest News")
@@ -203,6 +208,19 @@ def make_reply(question, safety_data, news_data):
 
     question = question.lower()
 
+    # ---------------- WHY / EXPLAIN ----------------
+    if "why" in question or "explain" in question:
+        drivers = "\n".join(
+            f"• {c['feature']}: {c['contribution']:+.3f}"
+            for c in safety_data["contributions"][:3]
+        )
+        return (
+            f"🔎 **Why {safety_data['label']}?**\n\n"
+            "Biggest effects on the market score:\n"
+            f"{drivers}\n"
+            f"• News Sentiment: {sentiment}\n"
+        )
+
     # ---------------- BUY / INVEST ----------------
     if "buy" in question or "invest" in question:
         if score >= 0.75:
@@ -255,6 +273,7 @@ def make_reply(question, safety_data, news_data):
         "• What is the risk level?\n"
         "• Should I invest now?\n"
         "• What does sentiment say?\n"
+        "• Why is this stock risky?\n"
     )
 
 # Handle input
@@ -0,0 +1,470 @@
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from ml_pipeline import fetch_history, fetch_index_history, fetch_fundamentals
+from predict_safety import FEATURES, explain_rows, feature_baselines, reference_means, build_safety_result
+from ai_news import get_news_analysis
+
+# ===============================================================
+# 1) Bars + Ring Buffer
+# ===============================================================
+
+Bar = namedtuple("Bar", ["symbol", "ts", "open", "high", "low", "close", "volume"])
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# One NSE session of 1-minute bars (09:15 - 15:30)
+DEFAULT_CAPACITY = 375
+
+
+class BarRing:
+    """
+    Fixed-size bar store for one symbol.
+    Once full, each new bar overwrites the oldest one.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.ts = np.empty(capacity, dtype=object)
+        self.values = np.full((capacity, len(BAR_COLUMNS)), np.nan)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def last_ts(self):
+        if self.size == 0:
+            return None
+        return self.ts[(self.head - 1) % self.capacity]
+
+    def append(self, bar):
+        ts = pd.Timestamp(bar.ts)
+        row = [bar.open, bar.high, bar.low, bar.close, bar.volume]
+
+        # A re-sent bar with the same timestamp (still forming) replaces the last one
+        if self.size and ts == self.last_ts():
+            self.values[(self.head - 1) % self.capacity] = row
+            return
+
+        self.ts[self.head] = ts
+        self.values[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last_close(self):
+        if self.size == 0:
+            return None
+        return self.values[(self.head - 1) % self.capacity, BAR_COLUMNS.index("Close")]
+
+# ===============================================================
+# 2) Bar Sources
+# ===============================================================
+
+INTRADAY_INTERVALS = ("1m", "5m")
+
+
+class ReplayBarSource:
+    """
+    Replays bars from a local CSV with columns
+    Symbol, Datetime, Open, High, Low, Close, Volume.
+    Yields one batch of bars per timestamp.
+    """
+
+    def __init__(self, path, delay=0.0):
+        self.path = path
+        self.delay = delay
+
+    @property
+    def symbols(self):
+        return pd.read_csv(self.path, usecols=["Symbol"])["Symbol"].unique().tolist()
+
+    def __iter__(self):
+        df = pd.read_csv(self.path, parse_dates=["Datetime"])
+
+        for ts, group in df.groupby("Datetime", sort=True):
+            yield [
+                Bar(r.Symbol, ts, r.Open, r.High, r.Low, r.Close, r.Volume)
+                for r in group.itertuples(index=False)
+            ]
+
+            if self.delay:
+                time.sleep(self.delay)
+
+
+class YFinanceBarSource:
+    """
+    Polls yfinance for today's 1m / 5m bars and yields only bars that
+    are new (or still forming) since the previous poll. Every poll is a
+    single yf.download call covering all symbols and the index.
+    """
+
+    def __init__(self, symbols, interval="1m", index_symbol="^NSEI", poll_seconds=None):
+        if interval not in INTRADAY_INTERVALS:
+            raise ValueError(f"interval must be one of {INTRADAY_INTERVALS}, got {interval!r}")
+
+        self.symbols = list(symbols)
+        self.index_symbol = index_symbol
+        self.interval = interval
+        self.poll_seconds = poll_seconds or (60 if interval == "1m" else 300)
+        self.last_seen = {}
+
+    def fetch_new_bars(self):
+        tickers = {
+            s if s.startswith("^") or s.endswith(".NS") else s + ".NS": s
+            for s in self.symbols + [self.index_symbol]
+        }
+
+        try:
+            df = yf.download(
+                list(tickers), period="1d", interval=self.interval,
+                group_by="ticker", progress=False, threads=True
+            )
+        except Exception as e:
+            print("Intraday fetch error:", e)
+            return []
+
+        bars = []
+        for ticker, symbol in tickers.items():
+            if isinstance(df.columns, pd.MultiIndex):
+                if ticker not in df.columns.get_level_values(0):
+                    continue
+                rows = df[ticker]
+            else:
+                rows = df
+
+            rows = rows.dropna(subset=["Close"])
+
+            last = self.last_seen.get(symbol)
+            if last is not None:
+                rows = rows[rows.index >= last]
+
+            if rows.empty:
+                continue
+
+            self.last_seen[symbol] = rows.index[-1]
+            bars.extend(
+                Bar(symbol, ts, r.Open, r.High, r.Low, r.Close, r.Volume)
+                for ts, r in rows.iterrows()
+            )
+
+        return bars
+
+    def __iter__(self):
+        while True:
+            yield self.fetch_new_bars()
+            time.sleep(self.poll_seconds)
+
+# ===============================================================
+# 3) Daily History Providers
+# ===============================================================
+
+class YFinanceDailyHistory:
+    """Daily closes, index history and fundamentals from yfinance."""
+
+    def __init__(self, period="1y"):
+        self.period = period
+
+    def history(self, symbol):
+        return fetch_history(symbol, self.period)
+
+    def index_history(self, index_symbol):
+        return fetch_index_history(index_symbol, self.period)
+
+    def fundamentals(self, symbol):
+        return fetch_fundamentals(symbol)
+
+
+class CsvDailyHistory:
+    """
+    Daily history from a local CSV with columns Symbol, Date, Close and,
+    optionally, marketCap, trailingPE, priceToBook, beta (the last row of
+    each symbol is used). The index is stored under its own symbol.
+    Pairs with ReplayBarSource so a replay runs entirely offline.
+    """
+
+    def __init__(self, path):
+        self.df = pd.read_csv(path, parse_dates=["Date"])
+
+    def history(self, symbol):
+        return self.df[self.df["Symbol"] == symbol].set_index("Date").sort_index()
+
+    def index_history(self, index_symbol):
+        return self.history(index_symbol)
+
+    def fundamentals(self, symbol):
+        rows = self.history(symbol)
+        if rows.empty:
+            return {}
+        return {k: rows[k].iloc[-1] for k in FUNDAMENTALS if k in rows}
+
+# ===============================================================
+# 4) Incremental Market Features
+# ===============================================================
+
+RETURN_WINDOWS = (7, 30, 90)
+SMA_WINDOWS = (20, 50)
+CORR_WINDOW = 30
+FUNDAMENTALS = ("marketCap", "trailingPE", "priceToBook", "beta")
+
+
+class SymbolState:
+    """
+    Daily closes for one symbol (and the index), with the rolling sums for
+    the current session precomputed so each live price updates the daily
+    features in O(1). Feature definitions match add_technical_indicators /
+    compute_market_features with today's close replaced by the live price.
+    """
+
+    def __init__(self, dates, closes, index_closes, fundamentals, news):
+        self.dates = np.asarray(dates, dtype=object)
+        self.all_closes = np.asarray(closes, dtype=float)
+        self.all_index_closes = np.asarray(index_closes, dtype=float)
+        self.fundamentals = fundamentals
+        self.news = news
+
+    def add_close(self, day, close, index_close=None):
+        """Record a finished session's close (replacing any existing row for that day)."""
+        if index_close is None:
+            index_close = self.index_closes[-1]
+
+        keep = self.dates != day
+        dates = np.append(self.dates[keep], day)
+        order = np.argsort(dates)
+
+        self.dates = dates[order]
+        self.all_closes = np.append(self.all_closes[keep], close)[order]
+        self.all_index_closes = np.append(self.all_index_closes[keep], index_close)[order]
+
+    def start_session(self, day):
+        """Use sessions before `day` as prior closes; False if history is too short."""
+        keep = self.dates < day
+        if keep.sum() <= max(RETURN_WINDOWS):
+            return False
+
+        closes = self.closes = self.all_closes[keep]
+        index_closes = self.index_closes = self.all_index_closes[keep]
+
+        self.sma_sums = {w: closes[-(w - 1):].sum() for w in SMA_WINDOWS}
+
+        # The previous CORR_WINDOW - 1 daily returns; the live return completes the window
+        c = closes[-CORR_WINDOW:]
+        ic = index_closes[-CORR_WINDOW:]
+        x = c[1:] / c[:-1] - 1
+        y = ic[1:] / ic[:-1] - 1
+        self.corr_sums = np.array([x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum()])
+
+        return True
+
+    def live_corr(self, x, y):
+        sx, sy, sxx, syy, sxy = self.corr_sums + [x, y, x * x, y * y, x * y]
+        n = CORR_WINDOW
+
+        cov = sxy - sx * sy / n
+        var = (sxx - sx * sx / n) * (syy - sy * sy / n)
+        return cov / np.sqrt(var) if var > 0 else np.nan
+
+    def features(self, price, index_price=None):
+        c, ic = self.closes, self.index_closes
+        if index_price is None:
+            index_price = ic[-1]
+
+        out = dict(self.fundamentals)
+
+        for n in RETURN_WINDOWS:
+            out[f"{n}d_return"] = price / c[-n] - 1
+            out[f"index_{n}d_ret"] = index_price / ic[-n] - 1
+
+        out["alpha_30d"] = out["30d_return"] - out["index_30d_ret"]
+        out["alpha_90d"] = out["90d_return"] - out["index_90d_ret"]
+
+        for w, s in self.sma_sums.items():
+            out[f"SMA_{w}"] = (s + price) / w
+
+        out["corr_30"] = self.live_corr(price / c[-1] - 1, index_price / ic[-1] - 1)
+
+        return np.array([out.get(f, np.nan) for f in FEATURES], dtype=float)
+
+# ===============================================================
+# 5) Streaming Scorer
+# ===============================================================
+
+NEUTRAL_NEWS = {"final_score": 0.5, "sentiment": "Neutral"}
+
+
+class IntradayScorer:
+    """
+    Ingests intraday bars into per-symbol ring buffers and keeps safety
+    scores current. Only symbols whose price (or the index) moved since
+    the last pass are re-scored, all in one batched model call.
+    When bars move to a new date, each symbol's last price of the finished
+    session is appended to its daily closes before scoring continues.
+
+    Daily closes and fundamentals come from `daily` (yfinance by default,
+    or CsvDailyHistory for offline replays).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, daily=None, index_symbol="^NSEI", with_news=True):
+        self.capacity = capacity
+        self.daily = daily or YFinanceDailyHistory()
+        self.index_symbol = index_symbol
+        self.with_news = with_news
+
+        self.buffers = {}
+        self.states = {}
+        self.active = set()
+        self.session_day = None
+        self.dirty = set()
+        self.scores = {}
+
+    def seed(self, symbols):
+        """Load daily closes, fundamentals, one shared index history and the
+        attribution baselines before the stream starts."""
+        reference_means()
+        index_history = self.daily.index_history(self.index_symbol)
+
+        for symbol in symbols:
+            if symbol == self.index_symbol:
+                continue
+
+            hist = self.daily.history(symbol)
+            if hist is None or hist.empty:
+                print("No daily history for", symbol)
+                continue
+
+            if index_history.empty:
+                index_closes = np.full(len(hist), np.nan)
+            else:
+                index_closes = index_history["Close"].reindex(hist.index).ffill().values
+
+            fundamentals = {k: v for k, v in self.daily.fundamentals(symbol).items() if k in FUNDAMENTALS}
+            news = get_news_analysis(symbol) if self.with_news else NEUTRAL_NEWS
+
+            self.states[symbol] = SymbolState(
+                hist.index.date, hist["Close"].values, index_closes, fundamentals, news
+            )
+
+    def live_price(self, symbol):
+        """Last close of `symbol` in the current session, or None."""
+        ring = self.buffers.get(symbol)
+        if ring is None or not len(ring) or ring.last_ts().date() != self.session_day:
+            return None
+        return ring.last_close()
+
+    def _start_session(self, day):
+        # Score what is still pending from the finished session
+        flushed = self.rescore()
+
+        if self.session_day is not None:
+            index_close = self.live_price(self.index_symbol)
+            for symbol in self.active:
+                state = self.states[symbol]
+                close = self.live_price(symbol)
+                if close is not None:
+                    state.add_close(self.session_day, close, index_close)
+
+        self.session_day = day
+        self.active = set()
+
+        for symbol, state in self.states.items():
+            if state.start_session(day):
+                self.active.add(symbol)
+            else:
+                print("Not enough daily history for", symbol)
+
+        return flushed
+
+    def ingest(self, bar):
+        """
+        Add one bar. Returns the final scores of the previous session when
+        this bar starts a new one, otherwise an empty dict.
+        """
+        flushed = {}
+
+        if np.isnan(float(bar.close)):
+            return flushed
+
+        day = pd.Timestamp(bar.ts).date()
+        if self.session_day is not None and day < self.session_day:
+            return flushed
+        if day != self.session_day:
+            flushed = self._start_session(day)
+
+        previous = self.live_price(bar.symbol)
+
+        ring = self.buffers.get(bar.symbol)
+        if ring is None:
+            ring = self.buffers[bar.symbol] = BarRing(self.capacity)
+        ring.append(bar)
+
+        if ring.last_close() == previous:
+            return flushed
+
+        # Index move changes the market features of every symbol trading this session
+        if bar.symbol == self.index_symbol:
+            self.dirty.update(s for s in self.active if self.live_price(s) is not None)
+        elif bar.symbol in self.active:
+            self.dirty.add(bar.symbol)
+
+        return flushed
+
+    def rescore(self):
+        """Re-score changed symbols; returns {symbol: result} for those only."""
+        if not self.dirty:
+            return {}
+
+        symbols = sorted(self.dirty)
+        index_price = self.live_price(self.index_symbol)
+
+        X = np.vstack([
+            self.states[s].features(self.live_price(s), index_price) for s in symbols
+        ])
+        scores, contributions = explain_rows(X, feature_baselines(X))
+
+        updated = {}
+        for i, symbol in enumerate(symbols):
+            result = build_safety_result(
+                float(scores[i]), self.states[symbol].news, contributions[i]
+            )
+            result["as_of"] = self.buffers[symbol].last_ts()
+            updated[symbol] = result
+
+        self.scores.update(updated)
+        self.dirty.clear()
+
+        return updated
+
+    def run(self, source):
+        """Seed the source's symbols, then yield each batch of score updates."""
+        self.seed(source.symbols)
+
+        for batch in source:
+            for bar in batch:
+                flushed = self.ingest(bar)
+                if flushed:
+                    yield flushed
+
+            updated = self.rescore()
+            if updated:
+                yield updated
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python intraday.py <bars.csv> [daily.csv]")
+        print("bars.csv columns:  Symbol, Datetime, Open, High, Low, Close, Volume")
+        print("daily.csv columns: Symbol, Date, Close[, marketCap, trailingPE, priceToBook, beta]")
+        print("Without daily.csv the daily history is fetched from yfinance.")
+        sys.exit(1)
+
+    daily = CsvDailyHistory(sys.argv[2]) if len(sys.argv) == 3 else None
+    scorer = IntradayScorer(daily=daily, with_news=False)
+
+    for updated in scorer.run(ReplayBarSource(sys.argv[1])):
+        for symbol, r in updated.items():
+            print(r["as_of"], symbol, r["emoji"], r["score"], r["label"])
@@ -104,6 +104,22 @@ def fetch_history(symbol, period="3y"):
         print("Stock fetch error:", e)
         return pd.DataFrame()
 
+def fetch_fundamentals(symbol):
+    try:
+        t = yf.Ticker(symbol + ".NS" if not symbol.endswith(".NS") else symbol)
+        info = t.info
+    except Exception as e:
+        print("Info fetch error:", e)
+        info = {}
+
+    return {
+        "marketCap": info.get("marketCap", np.nan),
+        "trailingPE": info.get("trailingPE", np.nan),
+        "priceToBook": info.get("priceToBook", np.nan),
+        "beta": info.get("beta", np.nan),
+        "sector": info.get("sector", None)
+    }
+
 # ===============================================================
 # 5) Future Stats (labels)
 # ===============================================================
@@ -140,13 +156,8 @@ def build_features_for_ticker(symbol, period="3y", include_info=True, index_symb
 
     # Fundamentals
     if include_info:
-        t = yf.Ticker(symbol + ".NS" if not symbol.endswith(".NS") else symbol)
-        info = t.info
-        hist["marketCap"] = info.get("marketCap", np.nan)
-        hist["trailingPE"] = info.get("trailingPE", np.nan)
-        hist["priceToBook"] = info.get("priceToBook", np.nan)
-        hist["beta"] = info.get("beta", np.nan)
-        hist["sector"] = info.get("sector", None)
+        for key, value in fetch_fundamentals(symbol).items():
+            hist[key] = value
 
     # Future labels
     hist = compute_future_stats(hist)
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import json
 from joblib import load
 
@@ -11,7 +12,9 @@ from ai_news import get_news_analysis
 
 model = load("models/safety_model.joblib")
 
-with open("safety_model_metadata.json", "r") as f:
+META_PATH = "safety_model_metadata.json"
+
+with open(META_PATH, "r") as f:
     meta = json.load(f)
 
 FEATURES = meta["features"]
@@ -29,41 +32,130 @@ def categorize_score(score):
         return "RISKY", "🔴"
 
 # ======================================================
-# MAIN PREDICTION FUNCTION
+# FEATURE ATTRIBUTION
 # ======================================================
 
-def predict_safety(symbol):
+_reference_means = None
+
+
+def compute_feature_means(tickers=None):
     """
-    Final stock safety prediction using:
-    - ML market model
-    - News sentiment (ML + VADER)
+    Mean of every feature over the training tickers' last year of history,
+    i.e. the "typical stock" of the universe the model was trained on.
     """
+    frames = []
+    for ticker in tickers or meta["tickers_used"]:
+        df = build_features_for_ticker(ticker, period="1y")
+        if df is not None and not df.empty:
+            frames.append(df.reindex(columns=FEATURES))
 
-    # -------------------------------
-    # Market-based ML prediction
-    # -------------------------------
-    df = build_features_for_ticker(symbol, period="1y")
-
-    if df is None or df.empty:
+    if not frames:
         return None
 
-    latest_row = df.iloc[-1]
-    X = latest_row[FEATURES].values.reshape(1, -1)
+    means = pd.concat(frames).mean()
+    return {f: float(means[f]) for f in FEATURES}
+
+
+def save_feature_means():
+    """
+    Store the reference means in the metadata. Run offline (python predict_safety.py)
+    whenever the model is retrained; scoring never fetches the universe itself.
+    """
+    meta["feature_means"] = compute_feature_means()
+
+    with open(META_PATH, "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def reference_means():
+    """Training-universe feature means from the metadata, loaded once per process."""
+    global _reference_means
+    if _reference_means is None:
+        _reference_means = meta.get("feature_means") or {}
+
+        missing = [f for f in FEATURES if _reference_means.get(f) is None]
+        if missing:
+            print(
+                "Warning: no feature_means in metadata for", ", ".join(missing),
+                "- run `python predict_safety.py` to save them"
+            )
+
+    return _reference_means
+
+
+def feature_baselines(X):
+    """
+    Reference values a feature is reset to when measuring its contribution.
+
+    The reference is the average training-universe stock, so a contribution
+    answers "how much does this feature move the score compared with a
+    typical stock" — not "what changed versus this stock's own history".
+
+    Features without a saved mean fall back to the scored batch's mean when
+    the batch has several rows. For a single row (every predict_safety call)
+    that mean would be the row itself, so those features get a NaN baseline
+    and therefore no attribution.
+    """
+    X = np.asarray(X, dtype=float)
+    means = reference_means()
+    ref = np.array([means.get(f, np.nan) for f in FEATURES], dtype=float)
+
+    if len(X) > 1:
+        counts = (~np.isnan(X)).sum(axis=0)
+        batch_mean = np.where(counts > 0, np.nansum(X, axis=0) / np.maximum(counts, 1), np.nan)
+        ref = np.where(np.isnan(ref), batch_mean, ref)
+
+    return ref
+
+
+def explain_rows(X, baselines):
+    """
+    Score a batch of feature rows and attribute each score to its features.
+
+    Every row is expanded into the original plus one copy per feature with
+    that feature reset to its baseline; the whole (n * (f + 1)) matrix goes
+    through the model in a single predict call.
+
+    Returns (scores, contributions) with shapes (n,) and (n, f).
+    """
+    X = np.asarray(X, dtype=float)
+    baselines = np.broadcast_to(np.asarray(baselines, dtype=float), X.shape)
+
+    n, f = X.shape
+    cols = np.arange(f)
 
-    market_score = float(model.predict(X)[0])
+    batch = np.repeat(X[:, None, :], f + 1, axis=1)
+    batch[:, cols + 1, cols] = baselines
 
-    # -------------------------------
-    # News-based sentiment
-    # -------------------------------
-    news_data = get_news_analysis(symbol)
-    news_score = news_data["final_score"]
+    preds = model.predict(batch.reshape(-1, f)).reshape(n, f + 1)
 
-    # -------------------------------
-    # Final weighted score
-    # -------------------------------
+    scores = preds[:, 0]
+    contributions = scores[:, None] - preds[:, 1:]
+
+    # Features with no usable baseline carry no attribution
+    contributions[np.isnan(baselines)] = 0.0
+
+    return scores, contributions
+
+
+def format_contributions(contributions):
+    return sorted(
+        (
+            {"feature": f, "contribution": round(float(c), 4)}
+            for f, c in zip(FEATURES, contributions)
+        ),
+        key=lambda d: abs(d["contribution"]),
+        reverse=True
+    )
+
+# ======================================================
+# MAIN PREDICTION FUNCTION
+# ======================================================
+
+def build_safety_result(market_score, news_data, contributions):
     final_score = (
         0.65 * market_score +
-        0.35 * news_score
+        0.35 * news_data["final_score"]
     )
 
     label, emoji = categorize_score(final_score)
@@ -73,6 +165,57 @@ def predict_safety(symbol):
         "label": label,
         "emoji": emoji,
         "market_score": round(market_score, 3),
-        "news_score": round(news_score, 3),
-        "sentiment": news_data["sentiment"]
+        "news_score": round(news_data["final_score"], 3),
+        "sentiment": news_data["sentiment"],
+        "contributions": format_contributions(contributions)
     }
+
+
+def predict_safety_batch(symbols):
+    """
+    Safety prediction for a universe of symbols.
+    Market scores and per-feature contributions for every symbol are
+    computed in one batched model call. Symbols without data are skipped.
+    """
+    rows, valid = [], []
+
+    for symbol in symbols:
+        df = build_features_for_ticker(symbol, period="1y")
+
+        if df is None or df.empty:
+            continue
+
+        rows.append(df.iloc[-1][FEATURES].values)
+        valid.append(symbol)
+
+    if not valid:
+        return {}
+
+    X = np.vstack(rows).astype(float)
+    scores, contributions = explain_rows(X, feature_baselines(X))
+
+    results = {}
+    for i, symbol in enumerate(valid):
+        news_data = get_news_analysis(symbol)
+        results[symbol] = build_safety_result(
+            float(scores[i]), news_data, contributions[i]
+        )
+
+    return results
+
+
+def predict_safety(symbol):
+    """
+    Final stock safety prediction using:
+    - ML market model
+    - News sentiment (ML + VADER)
+
+    "contributions" lists each feature's effect on the market score
+    relative to a typical universe stock, largest first.
+    """
+    return predict_safety_batch([symbol]).get(symbol)
+
+
+if __name__ == "__main__":
+    # python predict_safety.py  -> refresh feature_means in the metadata
+    save_feature_means()
@@ -0,0 +1,36 @@
+import os
+import sys
+import types
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# predict_safety reads its model and metadata relative to the repo root
+os.chdir(ROOT)
+
+
+class StubModel:
+    """Linear stand-in for the safety model (NaN inputs count as 0)."""
+
+    def __init__(self, n_features):
+        self.weights = np.linspace(0.1, 1.0, n_features)
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return np.nan_to_num(np.asarray(X, dtype=float)) @ self.weights
+
+
+# The trained model and the news stack (Streamlit secrets, NewsAPI) are not
+# available in tests; swap them before predict_safety is imported.
+_load = joblib.load
+joblib.load = lambda path, *a, **k: StubModel(15) if "safety_model" in str(path) else _load(path, *a, **k)
+
+ai_news = types.ModuleType("ai_news")
+ai_news.get_news_analysis = lambda company: {
+    "headlines": [], "sentiment": "Neutral", "vader_score": 0, "ml_score": 0.5, "final_score": 0.5
+}
+sys.modules["ai_news"] = ai_news
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from intraday import Bar, CsvDailyHistory, IntradayScorer, ReplayBarSource
+from ml_pipeline import add_technical_indicators, compute_market_features
+from predict_safety import FEATURES
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+DAILY_CSV = os.path.join(DATA, "daily.csv")
+BARS_CSV = os.path.join(DATA, "replay_bars.csv")
+
+INDEX = "^NSEI"
+MARKET_FEATURES = [
+    "7d_return", "30d_return", "90d_return",
+    "index_7d_ret", "index_30d_ret", "index_90d_ret",
+    "alpha_30d", "alpha_90d", "corr_30", "SMA_20", "SMA_50",
+]
+
+
+def bar(symbol, ts, close):
+    return Bar(symbol, pd.Timestamp(ts), close, close, close, close, 100)
+
+
+@pytest.fixture
+def scorer():
+    s = IntradayScorer(daily=CsvDailyHistory(DAILY_CSV), with_news=False)
+    s.seed(["AAA", "BBB"])
+    return s
+
+
+def test_incremental_features_match_pandas_pipeline(scorer):
+    ts = "2024-06-03 09:20"
+    price, index_price = 3650.0, 21000.0
+
+    scorer.ingest(bar(INDEX, ts, index_price))
+    scorer.ingest(bar("AAA", ts, price))
+
+    daily = CsvDailyHistory(DAILY_CSV)
+    today = pd.Timestamp("2024-06-03")
+    hist = pd.concat([daily.history("AAA")[["Close"]], pd.DataFrame({"Close": [price]}, index=[today])])
+    idx = pd.concat([daily.history(INDEX)[["Close"]], pd.DataFrame({"Close": [index_price]}, index=[today])])
+
+    hist = add_technical_indicators(hist)
+    expected = hist.join(compute_market_features(hist, idx)).iloc[-1]
+
+    state = scorer.states["AAA"]
+    got = dict(zip(FEATURES, state.features(scorer.live_price("AAA"), scorer.live_price(INDEX))))
+
+    for f in MARKET_FEATURES:
+        assert got[f] == pytest.approx(expected[f], rel=1e-9), f
+    assert got["trailingPE"] == daily.fundamentals("AAA")["trailingPE"]
+
+
+def test_only_changed_symbols_are_rescored(scorer):
+    for symbol, close in [(INDEX, 21000.0), ("AAA", 3600.0), ("BBB", 800.0)]:
+        scorer.ingest(bar(symbol, "2024-06-03 09:15", close))
+    assert set(scorer.rescore()) == {"AAA", "BBB"}
+
+    # New bar for both, but only AAA's price moved
+    scorer.ingest(bar("AAA", "2024-06-03 09:16", 3601.0))
+    scorer.ingest(bar("BBB", "2024-06-03 09:16", 800.0))
+    assert set(scorer.rescore()) == {"AAA"}
+    assert scorer.rescore() == {}
+
+    # An index move changes every active symbol's market features
+    scorer.ingest(bar(INDEX, "2024-06-03 09:16", 21010.0))
+    assert scorer.dirty == {"AAA", "BBB"}
+    scorer.rescore()
+
+    scorer.ingest(bar(INDEX, "2024-06-03 09:17", 21010.0))
+    assert scorer.dirty == set()
+
+
+def test_new_session_appends_previous_close_and_returns_pending_scores(scorer):
+    scorer.ingest(bar(INDEX, "2024-06-03 09:15", 21000.0))
+    scorer.ingest(bar("AAA", "2024-06-03 09:15", 3600.0))
+    scorer.rescore()
+    scorer.ingest(bar("AAA", "2024-06-03 15:29", 3625.0))
+
+    before = len(scorer.states["AAA"].closes)
+    flushed = scorer.ingest(bar("AAA", "2024-06-04 09:15", 3630.0))
+
+    assert set(flushed) == {"AAA"}
+    assert flushed["AAA"]["as_of"] == pd.Timestamp("2024-06-03 15:29")
+
+    state = scorer.states["AAA"]
+    assert len(state.closes) == before + 1
+    assert state.closes[-1] == 3625.0
+    assert state.index_closes[-1] == 21000.0
+    assert scorer.dirty == {"AAA"}
+
+    # BBB had no bars on 2024-06-03, so its daily history is unchanged
+    assert len(scorer.states["BBB"].closes) == before
+
+
+def test_replay_runs_offline_across_sessions():
+    scorer = IntradayScorer(daily=CsvDailyHistory(DAILY_CSV), with_news=False)
+
+    updates = list(scorer.run(ReplayBarSource(BARS_CSV)))
+
+    as_of = [r["as_of"] for u in updates for r in u.values()]
+    assert {ts.date().isoformat() for ts in as_of} == {"2024-06-03", "2024-06-04"}
+    assert set(scorer.scores) == {"AAA", "BBB"}
+
+    for result in scorer.scores.values():
+        assert np.isfinite(result["market_score"])
+        assert result["label"] in ("SAFE", "MODERATE", "RISKY")
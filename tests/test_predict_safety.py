@@ -0,0 +1,57 @@
+import numpy as np
+
+import predict_safety
+from predict_safety import FEATURES, explain_rows, feature_baselines
+
+
+def test_contribution_is_score_minus_prediction_with_feature_reset():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3, len(FEATURES)))
+    baselines = rng.normal(size=len(FEATURES))
+
+    scores, contributions = explain_rows(X, baselines)
+
+    model = predict_safety.model
+    for i in range(len(X)):
+        assert np.isclose(scores[i], model.predict(X[i:i + 1])[0])
+        for j in range(len(FEATURES)):
+            reset = X[i].copy()
+            reset[j] = baselines[j]
+            expected = scores[i] - model.predict(reset[None, :])[0]
+            assert np.isclose(contributions[i, j], expected)
+
+
+def test_whole_batch_is_one_model_call():
+    X = np.ones((4, len(FEATURES)))
+    before = predict_safety.model.calls
+
+    explain_rows(X, np.zeros(len(FEATURES)))
+
+    assert predict_safety.model.calls == before + 1
+
+
+def test_nan_baseline_gets_no_attribution():
+    X = np.ones((2, len(FEATURES)))
+    baselines = np.zeros(len(FEATURES))
+    baselines[[0, 5]] = np.nan
+
+    _, contributions = explain_rows(X, baselines)
+
+    assert (contributions[:, [0, 5]] == 0).all()
+    assert (contributions[:, 1] != 0).all()
+
+
+def test_missing_means_fall_back_to_batch_mean_only_for_batches(monkeypatch):
+    monkeypatch.setattr(predict_safety, "_reference_means", {FEATURES[0]: 10.0})
+
+    X = np.arange(2 * len(FEATURES), dtype=float).reshape(2, -1)
+    X[:, 2] = np.nan
+
+    batch = feature_baselines(X)
+    assert batch[0] == 10.0
+    assert batch[1] == X[:, 1].mean()
+    assert np.isnan(batch[2])
+
+    single = feature_baselines(X[:1])
+    assert single[0] == 10.0
+    assert np.isnan(single[1:]).all()